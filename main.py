@@ -1,10 +1,16 @@
+import asyncio
+import math
 import os
+import time
+import orjson
+from functools import lru_cache
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
-from typing import Literal, Optional, List, Tuple
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import Dict, Literal, Optional, List, Tuple
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,7 +22,7 @@ app.add_middleware(
 
 
 class ProteinRequest(BaseModel):
-    weight: float = Field(..., gt=0, description="Body weight value")
+    weight: float = Field(..., gt=0, le=1000, description="Body weight value")
     unit: Literal["kg", "lb"] = Field("kg", description="Unit of weight")
     activity: Literal["low", "moderate", "high"] = Field(
         "moderate", description="Typical training volume/intensity"
@@ -27,12 +33,6 @@ class ProteinRequest(BaseModel):
     age: Optional[int] = Field(None, ge=10, le=100)
     sex: Optional[Literal["male", "female", "other"]] = None
 
-    @validator("weight")
-    def validate_weight(cls, v):
-        if v > 1000:
-            raise ValueError("Weight value seems unrealistic")
-        return v
-
 
 class MacroSplit(BaseModel):
     protein_g: int
@@ -59,150 +59,256 @@ class ProteinResponse(BaseModel):
     suggestions: List[MealSuggestion]
 
 
+# Constant bodies are encoded once at import and the same response reused
+_ROOT_RESPONSE = ORJSONResponse({"message": "Hello from FastAPI Backend!"})
+_HELLO_RESPONSE = ORJSONResponse({"message": "Hello from the backend API!"})
+
+
 @app.get("/")
-def read_root():
-    return {"message": "Hello from FastAPI Backend!"}
+async def read_root():
+    return _ROOT_RESPONSE
 
 
 @app.get("/api/hello")
-def hello():
-    return {"message": "Hello from the backend API!"}
+async def hello():
+    return _HELLO_RESPONSE
+
+
+# Base splits per archetype
+_ARCHETYPES: Tuple[Tuple[str, str, Tuple[int, int, int]], ...] = (
+    ("Lifting Beast", "Build thick strength with steady carbs.", (30, 45, 25)),
+    ("Mat Dominator", "Mat-ready power with cutting-edge leanness.", (35, 35, 30)),
+    ("Track Rocket", "Explosive speed fueled by fast carbs.", (25, 50, 25)),
+    ("Grand Tour Engine", "Endurance-first fuel for long days in the saddle.", (20, 60, 20)),
+)
+
+# Adjust split subtly by user goal
+_GOAL_ADJ: Dict[str, int] = {"fat_loss": 5, "maintenance": 0, "muscle_gain": 0}
+
+# Simple sample meals crafted to fit archetype theme
+_BASE_MEALS: Dict[str, Tuple[str, ...]] = {
+    "Lifting Beast": (
+        "Breakfast: Greek yogurt parfait + oats + whey",
+        "Lunch: Steak bowl with rice, beans, salsa",
+        "Snack: Cottage cheese + fruit + almonds",
+        "Dinner: Chicken thighs, potatoes, roasted veg",
+    ),
+    "Mat Dominator": (
+        "Breakfast: Egg white omelet + spinach + toast",
+        "Lunch: Turkey rice bowl + kimchi",
+        "Snack: Beef jerky + banana",
+        "Dinner: Salmon, quinoa, mixed greens",
+    ),
+    "Track Rocket": (
+        "Breakfast: Protein pancakes + berries",
+        "Lunch: Teriyaki chicken + jasmine rice",
+        "Snack: Low-fat chocolate milk + pretzels",
+        "Dinner: Lean beef pasta + tomato sauce",
+    ),
+    "Grand Tour Engine": (
+        "Breakfast: Oats + honey + whey + banana",
+        "Ride Fuel: Rice cakes + isotonic drink",
+        "Lunch: Tuna baguette + fruit",
+        "Dinner: Chicken risotto + olive oil drizzle",
+    ),
+}
+
+_DEFAULT_MEALS: Tuple[str, ...] = (
+    "Breakfast: Eggs + oats + fruit",
+    "Lunch: Chicken rice bowl",
+    "Snack: Yogurt + nuts",
+    "Dinner: Fish, potatoes, vegetables",
+)
 
 
 def _round5(x: float) -> int:
-    return int(round(x / 5.0) * 5)
+    # Macros are always non-negative, so truncating after +2.5 rounds to nearest 5
+    return int(x + 2.5) // 5 * 5
 
 
-def _make_plan(name: str, tagline: str, pct: tuple[int, int, int], protein_g: int) -> MealSuggestion:
-    p_pct, c_pct, f_pct = pct
+def _plan_math(protein_g: float, p_pct: int, c_pct: int, f_pct: int) -> Tuple[int, int, int, int]:
     # Total calories derived from protein and split
     # protein kcal = protein_g*4 = p_pct% of total
-    total_kcal = (protein_g * 4.0) / (p_pct / 100.0)
-    carbs_g = total_kcal * (c_pct / 100.0) / 4.0
-    fats_g = total_kcal * (f_pct / 100.0) / 9.0
-
-    macros = MacroSplit(
-        protein_g=_round5(protein_g),
-        carbs_g=_round5(carbs_g),
-        fats_g=_round5(fats_g),
-        split_percent={"protein": p_pct, "carbs": c_pct, "fats": f_pct},
-        calories=int(round(total_kcal)),
-    )
+    # (factors of 100 and 4 cancel, leaving a single division)
+    inv_p = 1.0 / p_pct
+    total_kcal = protein_g * 400.0 * inv_p
+    carbs_g = protein_g * c_pct * inv_p
+    fats_g = protein_g * (4.0 / 9.0) * f_pct * inv_p
+    return _round5(protein_g), _round5(carbs_g), _round5(fats_g), int(round(total_kcal))
 
-    # Simple sample meals crafted to fit archetype theme
-    base_meals = {
-        "Lifting Beast": [
-            "Breakfast: Greek yogurt parfait + oats + whey",
-            "Lunch: Steak bowl with rice, beans, salsa",
-            "Snack: Cottage cheese + fruit + almonds",
-            "Dinner: Chicken thighs, potatoes, roasted veg",
-        ],
-        "Mat Dominator": [
-            "Breakfast: Egg white omelet + spinach + toast",
-            "Lunch: Turkey rice bowl + kimchi",
-            "Snack: Beef jerky + banana",
-            "Dinner: Salmon, quinoa, mixed greens",
-        ],
-        "Track Rocket": [
-            "Breakfast: Protein pancakes + berries",
-            "Lunch: Teriyaki chicken + jasmine rice",
-            "Snack: Low-fat chocolate milk + pretzels",
-            "Dinner: Lean beef pasta + tomato sauce",
-        ],
-        "Grand Tour Engine": [
-            "Breakfast: Oats + honey + whey + banana",
-            "Ride Fuel: Rice cakes + isotonic drink",
-            "Lunch: Tuna baguette + fruit",
-            "Dinner: Chicken risotto + olive oil drizzle",
-        ],
+
+def _make_plan(name: str, tagline: str, pct: tuple[int, int, int], protein_g: int) -> dict:
+    p_pct, c_pct, f_pct = pct
+    protein, carbs, fats, calories = _plan_math(protein_g, p_pct, c_pct, f_pct)
+
+    # Plain dicts shaped like MacroSplit / MealSuggestion; see ProteinResponse
+    macros = {
+        "protein_g": protein,
+        "carbs_g": carbs,
+        "fats_g": fats,
+        "split_percent": {"protein": p_pct, "carbs": c_pct, "fats": f_pct},
+        "calories": calories,
     }
 
-    meals = base_meals.get(name, [
-        "Breakfast: Eggs + oats + fruit",
-        "Lunch: Chicken rice bowl",
-        "Snack: Yogurt + nuts",
-        "Dinner: Fish, potatoes, vegetables",
-    ])
+    meals = _BASE_MEALS.get(name, _DEFAULT_MEALS)
 
-    return MealSuggestion(name=name, tagline=tagline, macros=macros, sample_meals=meals)
+    return {"name": name, "tagline": tagline, "macros": macros, "sample_meals": meals}
 
 
-@app.post("/api/protein", response_model=ProteinResponse)
-def calculate_protein(req: ProteinRequest):
-    # Convert to kg
-    weight_kg = req.weight if req.unit == "kg" else req.weight * 0.45359237
-
-    # Base range by activity
-    if req.activity == "low":
-        base_min, base_max = 1.2, 1.6
-    elif req.activity == "moderate":
-        base_min, base_max = 1.6, 2.0
-    else:  # high
-        base_min, base_max = 1.8, 2.2
-
-    # Goal adjustments
-    if req.goal == "fat_loss":
-        base_min += 0.2
-        base_max += 0.2
-    elif req.goal == "muscle_gain":
-        base_min += 0.1
-        base_max += 0.1
-
-    # Clamp to sensible range
-    min_gkg = max(1.2, round(base_min, 2))
-    max_gkg = min(2.7, round(base_max, 2))
-
-    daily_min = int(round(min_gkg * weight_kg))
-    daily_max = int(round(max_gkg * weight_kg))
-    target = int(round(((min_gkg + max_gkg) / 2.0) * weight_kg))
-
-    rationale = (
+def _adjust_split(p: int, c: int, f: int, p_bump: int) -> Tuple[int, int, int]:
+    adj_p = min(45, p + p_bump)
+    # reduce carbs primarily, keep fats steady unless carbs would go <35 then borrow from fats
+    reduce_from_carbs = p_bump
+    adj_c = max(30, c - reduce_from_carbs)
+    total = adj_p + adj_c + f
+    if total != 100:
+        # Normalize by trimming fats if needed or adding to carbs
+        diff = 100 - total
+        f = max(20, f + diff)
+    return adj_p, adj_c, f
+
+
+@lru_cache(maxsize=4096)
+def _build_suggestions(goal: str, target: int) -> Tuple[dict, ...]:
+    # Build themed meal suggestions with macro splits
+    p_bump = _GOAL_ADJ.get(goal, 0)
+
+    return tuple(
+        _make_plan(name, tag, _adjust_split(p, c, f, p_bump), target)
+        for name, tag, (p, c, f) in _ARCHETYPES
+    )
+
+
+# g/kg protein range per (activity, goal): base range by activity
+# (low 1.2-1.6, moderate 1.6-2.0, high 1.8-2.2), shifted +0.2 for fat loss
+# and +0.1 for muscle gain, clamped to 1.2-2.7
+_GKG_TABLE: Dict[Tuple[str, str], Tuple[float, float]] = {
+    ("low", "fat_loss"): (1.4, 1.8),
+    ("low", "maintenance"): (1.2, 1.6),
+    ("low", "muscle_gain"): (1.3, 1.7),
+    ("moderate", "fat_loss"): (1.8, 2.2),
+    ("moderate", "maintenance"): (1.6, 2.0),
+    ("moderate", "muscle_gain"): (1.7, 2.1),
+    ("high", "fat_loss"): (2.0, 2.4),
+    ("high", "maintenance"): (1.8, 2.2),
+    ("high", "muscle_gain"): (1.9, 2.3),
+}
+
+
+def _rationale(min_gkg: float, max_gkg: float) -> str:
+    return (
         "Based on your activity and goal, a range of "
         f"{min_gkg}-{max_gkg} g/kg is appropriate. "
         "Using your body weight, that translates to the amounts shown. "
         "Hitting the middle of the range is a practical daily target."
     )
 
-    # Build themed meal suggestions with macro splits
-    # Base splits per archetype
-    archetypes = [
-        ("Lifting Beast", "Build thick strength with steady carbs.", (30, 45, 25)),
-        ("Mat Dominator", "Mat-ready power with cutting-edge leanness.", (35, 35, 30)),
-        ("Track Rocket", "Explosive speed fueled by fast carbs.", (25, 50, 25)),
-        ("Grand Tour Engine", "Endurance-first fuel for long days in the saddle.", (20, 60, 20)),
-    ]
-
-    # Adjust split subtly by user goal
-    goal_adj = {"fat_loss": 5, "maintenance": 0, "muscle_gain": 0}
-    p_bump = goal_adj.get(req.goal, 0)
-
-    suggestions: List[MealSuggestion] = []
-    for name, tag, (p, c, f) in archetypes:
-        adj_p = min(45, p + p_bump)
-        # reduce carbs primarily, keep fats steady unless carbs would go <35 then borrow from fats
-        reduce_from_carbs = p_bump
-        adj_c = max(30, c - reduce_from_carbs)
-        total = adj_p + adj_c + f
-        if total != 100:
-            # Normalize by trimming fats if needed or adding to carbs
-            diff = 100 - total
-            f = max(20, f + diff)
-        suggestions.append(_make_plan(name, tag, (adj_p, adj_c, f), target))
-
-    return ProteinResponse(
-        weight_kg=round(weight_kg, 2),
-        grams_per_kg_range=(min_gkg, max_gkg),
-        daily_grams_min=daily_min,
-        daily_grams_max=daily_max,
-        daily_grams_target=target,
-        rationale=rationale,
-        suggestions=suggestions,
+
+# Every activity x goal combination maps to one of a handful of g/kg ranges,
+# so the rationale text can be rendered once at import
+_RATIONALES: Dict[Tuple[float, float], str] = {
+    rng: _rationale(*rng) for rng in _GKG_TABLE.values()
+}
+
+
+def _encode(weight: float, unit: str, activity: str, goal: str) -> bytes:
+    # All quantities are positive, so floor(x + 0.5) rounds to nearest
+    _floor = math.floor
+
+    # Convert to kg
+    weight_kg = weight if unit == "kg" else weight * 0.45359237
+
+    min_gkg, max_gkg = _GKG_TABLE[(activity, goal)]
+
+    daily_min = _floor(min_gkg * weight_kg + 0.5)
+    daily_max = _floor(max_gkg * weight_kg + 0.5)
+    target = _floor(((min_gkg + max_gkg) / 2.0) * weight_kg + 0.5)
+
+    rationale = _RATIONALES[(min_gkg, max_gkg)]
+
+    suggestions = _build_suggestions(goal, target)
+
+    # Cache the encoded body so no shared mutable state reaches a response
+    return orjson.dumps({
+        "weight_kg": _floor(weight_kg * 100 + 0.5) / 100.0,
+        "grams_per_kg_range": (min_gkg, max_gkg),
+        "daily_grams_min": daily_min,
+        "daily_grams_max": daily_max,
+        "daily_grams_target": target,
+        "rationale": rationale,
+        "suggestions": suggestions,
+    })
+
+
+# Both response paths below go through _encode, so they can't drift apart
+@lru_cache(maxsize=8192)
+def _compute(weight: float, unit: str, activity: str, goal: str) -> bytes:
+    return _encode(weight, unit, activity, goal)
+
+
+# Serialized responses for the common whole-number weights, encoded at import
+# so those requests skip computation and JSON encoding entirely. Built with
+# _encode directly so _compute's LRU only holds inputs that miss the grid.
+_RESPONSE_CACHE: Dict[Tuple[float, str, str, str], bytes] = {
+    key: _encode(*key)
+    for key in (
+        (float(weight), unit, activity, goal)
+        for weight in range(40, 151)
+        for unit in ("kg", "lb")
+        for activity in ("low", "moderate", "high")
+        for goal in ("fat_loss", "maintenance", "muscle_gain")
     )
+}
+
+
+# Response model is for OpenAPI docs only; the handler returns pre-encoded
+# bytes so FastAPI skips both model validation and jsonable_encoder
+@app.post(
+    "/api/protein",
+    response_model=None,
+    responses={200: {"model": ProteinResponse}},
+)
+async def calculate_protein(req: ProteinRequest):
+    key = (req.weight, req.unit, req.activity, req.goal)
+    body = _RESPONSE_CACHE.get(key)
+    if body is None:
+        body = _compute(*key)
+    return Response(content=body, media_type="application/json")
+
+
+# Last /test probe result, reused for _PROBE_TTL seconds so frequent health
+# checks don't each cost a MongoDB round-trip. The lock lets only one probe
+# run at a time; concurrent requests wait for it and share its result.
+_PROBE_TTL = 5.0
+_probe_cache: Optional[Tuple[float, dict]] = None
+_probe_lock = asyncio.Lock()
+
+
+def _load_db():
+    from database import db
+    return db
+
+
+def _probe_is_fresh() -> bool:
+    return _probe_cache is not None and time.monotonic() - _probe_cache[0] < _PROBE_TTL
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     """Test endpoint to check if database is available and accessible"""
+    global _probe_cache
+    if not _probe_is_fresh():
+        async with _probe_lock:
+            # Another request may have refreshed the probe while we waited
+            if not _probe_is_fresh():
+                _probe_cache = (time.monotonic(), await _probe_database())
+
+    cached = _probe_cache[1]
+    # Copy the nested list too so callers can't mutate the cached probe
+    return dict(cached, collections=list(cached["collections"]))
+
+
+async def _probe_database() -> dict:
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -213,8 +319,9 @@ def test_database():
     }
     
     try:
-        # Try to import database module
-        from database import db
+        # Try to import database module; first import runs load_dotenv and
+        # MongoClient setup (DNS for SRV URLs), so keep it off the event loop
+        db = await asyncio.to_thread(_load_db)
         
         if db is not None:
             response["database"] = "✅ Available"
@@ -224,7 +331,8 @@ def test_database():
             
             # Try to list collections to verify connectivity
             try:
-                collections = db.list_collection_names()
+                # Run the blocking pymongo call off the event loop
+                collections = await asyncio.to_thread(db.list_collection_names)
                 response["collections"] = collections[:10]  # Show first 10 collections
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -238,7 +346,6 @@ def test_database():
         response["database"] = f"❌ Error: {str(e)[:50]}"
     
     # Check environment variables
-    import os
     response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
     response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
     